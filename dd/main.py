@@ -1,17 +1,31 @@
 # main.py - Détecteur Distant (DD) pour ESP32 + GT38 (MicroPython)
 # Version : 1.4 - Révision : robustesse NVS, straps, UART, watchdog
 
-from machine import Pin, UART, Timer, reset
+from machine import Pin, UART, WDT
+import micropython
+from micropython import const
 import time
 
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 # ============================ CONFIG ============================
-UART_PORT = 1
-UART_BAUD = 9600
-UART_TX_PIN = 32         # ESP32 → GT38 RX
-UART_RX_PIN = 33         # ESP32 ← GT38 TX
-RADIO_EN_PIN = 5         # Alimentation/Enable radio (optionnel)
-LED_PIN = 2              # LED de statut (ou LED intégrée)
-WATCHDOG_MS = 30000      # 30 s
+# const() + préfixe '_' : valeurs insérées dans le bytecode à la
+# compilation, sans entrée dans le dict des globales (voir manifest.py)
+_UART_PORT = const(1)
+_UART_BAUD = const(9600)
+_UART_TX_PIN = const(32)        # ESP32 → GT38 RX
+_UART_RX_PIN = const(33)        # ESP32 ← GT38 TX
+_RADIO_EN_PIN = const(5)        # Alimentation/Enable radio (optionnel)
+_LED_PIN = const(2)             # LED de statut (ou LED intégrée)
+_WATCHDOG_MS = const(30000)     # 30 s
+_WDT_FEED_MS = const(1000)      # période d'alimentation du watchdog
+_RX_CAP = const(256)            # capacité du tampon circulaire de réception
+_LED_POLL_MS = const(40)        # durée flash LED après un POLL
+_LED_SETID_MS = const(100)      # durée flash LED après un SETID
+_STATS_EVERY = const(1000)      # affichage des compteurs toutes les N boucles
 
 # ====================== ID UNIQUE DU DETECTEUR ==================
 def _get_id_from_config():
@@ -37,6 +51,9 @@ def _get_id_from_nvs():
         pass
     return None
 
+# table straps -> ID : val range 0..7 ; on ignore 0 et >5
+_STRAP_MAP = (None, "01", "02", "03", "04", "05", None, None)
+
 def _get_id_from_straps():
     try:
         # définir broches straps; pull-up attendu, strap à la masse pour 0
@@ -48,25 +65,26 @@ def _get_id_from_straps():
         bit1 = 0 if pB.value() == 0 else 1
         bit2 = 0 if pC.value() == 0 else 1
         val = (bit2 << 2) | (bit1 << 1) | (bit0 << 0)
-        # mapping explicite: val range 0..7 ; on ignore 0 et >5
-        mapping = {
-            1: "01",
-            2: "02",
-            3: "03",
-            4: "04",
-            5: "05"
-        }
-        return mapping.get(val, None)
+        # libérer les Pin, inutiles après lecture
+        del pA, pB, pC
+        return _STRAP_MAP[val]
     except Exception:
         return None
 
+_nvs = None
+
 def _persist_id_to_nvs(new_id):
+    # commit immédiat : set_blob écrit déjà en flash, différer le commit
+    # n'économise rien et perdrait l'ID sur coupure d'alimentation (le DD
+    # est alimenté par le circuit testé). SETID est rare et un ID inchangé
+    # n'est pas réécrit.
+    global _nvs
     try:
-        import esp32
-        n = esp32.NVS("dd")
-        b = new_id.encode()
-        n.set_blob("id", b)
-        n.commit()
+        if _nvs is None:
+            import esp32
+            _nvs = esp32.NVS("dd")
+        _nvs.set_blob("id", new_id.encode())
+        _nvs.commit()
         return True
     except Exception:
         return False
@@ -79,65 +97,72 @@ DETECTOR_ID = (
 )
 
 # ======================== INITIALISATION ========================
-led = Pin(LED_PIN, Pin.OUT)
+led = Pin(_LED_PIN, Pin.OUT)
 # clignotement court pour indiquer boot
 led.value(1)
 time.sleep_ms(100)
 led.value(0)
 
 try:
-    radio_en = Pin(RADIO_EN_PIN, Pin.OUT)
+    radio_en = Pin(_RADIO_EN_PIN, Pin.OUT)
     radio_en.value(1)
 except Exception:
     radio_en = None
 
 # Initialisation UART (MicroPython ESP32)
-uart = UART(UART_PORT, baudrate=UART_BAUD, tx=Pin(UART_TX_PIN), rx=Pin(UART_RX_PIN))
+uart = UART(_UART_PORT, baudrate=_UART_BAUD, tx=Pin(_UART_TX_PIN), rx=Pin(_UART_RX_PIN))
 
 # ========================== WATCHDOG ============================
-last_loop_ts = time.ticks_ms()
-_wdt_triggered = False
-
-def _blink_led(times, on_ms=80, off_ms=80):
-    for _ in range(times):
-        led.value(1)
-        time.sleep_ms(on_ms)
-        led.value(0)
-        time.sleep_ms(off_ms)
-
-def wdt_cb(t):
-    global last_loop_ts, _wdt_triggered
-    # protéger contre réentrance
-    if _wdt_triggered:
-        return
-    if time.ticks_diff(time.ticks_ms(), last_loop_ts) > WATCHDOG_MS:
-        _wdt_triggered = True
-        try:
-            _blink_led(4, 80, 80)
-        except Exception:
-            pass
-        reset()
-
-wdt_timer = Timer(0)
-wdt_timer.init(period=max(100, WATCHDOG_MS // 2), mode=Timer.PERIODIC, callback=wdt_cb)
+# watchdog matériel : redémarrage si wdt.feed() n'est plus appelé
+wdt = WDT(timeout=_WATCHDOG_MS)
 
 # ======================= OUTILS / PROTOCOLE =====================
+@micropython.viper
+def _scan_nl(buf, head: int, tail: int) -> int:
+    # recherche native de '\n' dans buf[head:tail] ; -1 si absent
+    p = ptr8(buf)
+    i = head
+    while i < tail:
+        if p[i] == 0x0A:
+            return i
+        i += 1
+    return -1
+
+_CMD_POLL = const(0)
+_CMD_SETID = const(1)
+_POLL_P = b"POLL:"
+_SETID_P = b"SETID:"
+
+def _starts(line, prefix):
+    # comparaison octet par octet : memoryview == bytes n'est pas gérée
+    # par MicroPython
+    n = len(prefix)
+    if len(line) < n:
+        return False
+    for k in range(n):
+        if line[k] != prefix[k]:
+            return False
+    return True
+
 def parse_line(line):
+    # line : memoryview sur le tampon de réception (pas de copie)
+    # préfixes comparés en octets, seul l'ID est décodé
     try:
-        s = line.decode().strip()
-    except Exception:
-        return None
-
-    if s.startswith("POLL:"):
-        parts = s.split(":", 1)
-        if len(parts) >= 2:
-            return ("POLL", parts[1].strip(), None)
-    if s.startswith("SETID:"):
-        parts = s.split(":", 1)
-        if len(parts) == 2:
-            candidate = parts[1].strip()
+        # ignorer les blancs de tête (ex. '\r' d'un émetteur en "\n\r")
+        i = 0
+        n = len(line)
+        while i < n and line[i] <= 0x20:
+            i += 1
+        if i:
+            line = line[i:]
+        if _starts(line, _POLL_P):
+            return (_CMD_POLL, bytes(line[5:]).strip().decode(), None)
+        if _starts(line, _SETID_P):
+            candidate = bytes(line[6:]).strip().decode()
             if 1 <= len(candidate) <= 8:
-                return ("SETID", candidate, None)
+                return (_CMD_SETID, candidate, None)
+    except Exception:
+        pass
     return None
 
 def measure_state():
@@ -145,100 +170,162 @@ def measure_state():
     return 1  # simulé : alimenté
 
 def _uart_write_str(s):
-    try:
-        uart.write(s.encode())
-    except Exception:
-        # tentative d'écriture en bytes si encode échoue
-        try:
-            uart.write(bytes(s))
-        except Exception:
-            pass
+    # pas de try ici : l'appelant est protégé par un try/except global
+    uart.write(s.encode())
 
-def send_ack(det_id, state):
-    _uart_write_str("ACK:{}:{}\n".format(det_id, 1 if state else 0))
+# trames ACK pré-encodées, reconstruites seulement quand l'ID change
+_ACK0 = b""
+_ACK1 = b""
+
+def _rebuild_ack_templates(did):
+    global _ACK0, _ACK1
+    p = ("ACK:" + did + ":").encode()
+    _ACK0 = p + b"0\n"
+    _ACK1 = p + b"1\n"
+
+_rebuild_ack_templates(DETECTOR_ID)
+
+def send_ack(state):
+    uart.write(_ACK1 if state else _ACK0)
 
 def send_ack_id_change(ok, new_id):
     _uart_write_str("ACKSETID:{}:{}\n".format(new_id, "OK" if ok else "ERR"))
 
+# ========================= TACHES ASYNC ========================
+_led_evt = asyncio.Event()
+_led_ms = 0
+
+def _led_flash(ms):
+    # demande un flash LED à led_task (non bloquant)
+    global _led_ms
+    _led_ms = ms
+    _led_evt.set()
+
+async def led_task():
+    _led_value = led.value
+    while True:
+        await _led_evt.wait()
+        _led_evt.clear()
+        _led_value(1)
+        await asyncio.sleep_ms(_led_ms)
+        _led_value(0)
+
+async def wdt_feed_task():
+    # alimenté tant que l'ordonnanceur tourne
+    _feed = wdt.feed
+    while True:
+        _feed()
+        await asyncio.sleep_ms(_WDT_FEED_MS)
+
 # ======================== BOUCLE PRINCIPALE =====================
-# buffer réutilisable
-buf = bytearray()
-loop_count = 0
-ok_count = 0           # POLL adressés à ce DD (ou ALL)
-nok_count = 0          # POLL non adressés à ce DD
-setid_ok_count = 0     # SETID persistés avec succès
-setid_err_count = 0    # SETID en erreur (échec NVS)
-
-_uart_write_str("BOOT:{}\n".format(DETECTOR_ID))
-led.value(0)
+_STATS_FMT = "[%d] id=%s ok=%d nok=%d setid_ok=%d setid_err=%d"
 
-while True:
-    last_loop_ts = time.ticks_ms()
-    loop_count += 1
+async def rx_task():
+    global DETECTOR_ID
 
-    # lecture uart
-    try:
-        if uart.any():
-            data = uart.read()
-            if data:
-                buf.extend(data)
+    # tampon de réception à capacité fixe : données valides dans rx[head:tail]
+    rx = bytearray(_RX_CAP)
+    rxmv = memoryview(rx)
+    head = 0
+    tail = 0
+    loop_count = 0
+    ok_count = 0           # POLL adressés à ce DD (ou ALL)
+    nok_count = 0          # POLL non adressés à ce DD
+    setid_ok_count = 0     # SETID persistés avec succès
+    setid_err_count = 0    # SETID en erreur (échec NVS)
+    stats_ctr = _STATS_EVERY  # décompte borné (pas de modulo)
+
+    # la coroutine n'est réveillée que lorsque des octets sont arrivés
+    sreader = asyncio.StreamReader(uart)
+
+    # méthodes liées en variables locales (LOAD_FAST dans la boucle)
+    _readinto = sreader.readinto
+    _scan = _scan_nl
+    _parse = parse_line
+
+    while True:
+        loop_count += 1
+
+        try:
+            # tampon plein : ramener les données en début de tampon
+            if tail == _RX_CAP:
+                if head:
+                    rx[:tail - head] = rx[head:tail]
+                    tail -= head
+                    head = 0
+                else:
+                    # ligne trop longue sans '\n' : abandon
+                    tail = 0
+            n = await _readinto(rxmv[tail:])
+            if n:
+                tail += n
                 # traiter toutes les lignes complètes
                 while True:
-                    nl = buf.find(b'\n')
+                    nl = _scan(rx, head, tail)
                     if nl == -1:
                         break
-                    # extraire ligne sans copie lourde
-                    line = bytes(buf[:nl + 1])
-                    # supprimer consommé
-                    del buf[:nl + 1]
+                    # extraire ligne sans copie
+                    line = rxmv[head:nl + 1]
+                    # avancer l'index de début
+                    head = nl + 1
 
-                    parsed = parse_line(line)
+                    parsed = _parse(line)
                     if not parsed:
                         continue
 
                     cmd, det_id, _ = parsed
 
-                    if cmd == "POLL":
+                    if cmd == _CMD_POLL:
                         if det_id == DETECTOR_ID or det_id.upper() == "ALL":
                             state = measure_state()
-                            send_ack(DETECTOR_ID, state)
+                            send_ack(state)
                             ok_count += 1
                             # feedback LED bref
-                            try:
-                                led.value(1)
-                                time.sleep_ms(40)
-                                led.value(0)
-                            except Exception:
-                                pass
+                            _led_flash(_LED_POLL_MS)
                         else:
                             nok_count += 1
 
-                    elif cmd == "SETID":
+                    elif cmd == _CMD_SETID:
                         new_id = det_id
-                        ok = _persist_id_to_nvs(new_id)
+                        # même ID : pas d'écriture flash inutile
+                        ok = new_id == DETECTOR_ID or _persist_id_to_nvs(new_id)
                         if ok:
                             DETECTOR_ID = new_id
+                            _rebuild_ack_templates(new_id)
                             setid_ok_count += 1
-                            try:
-                                led.value(1)
-                                time.sleep_ms(100)
-                                led.value(0)
-                            except Exception:
-                                pass
+                            _led_flash(_LED_SETID_MS)
                         else:
                             setid_err_count += 1
                         send_ack_id_change(ok, new_id)
+
+                # tout consommé : repartir du début du tampon
+                if head == tail:
+                    head = 0
+                    tail = 0
+        except Exception:
+            # protéger la boucle principale d'une exception UART/parse
+            await asyncio.sleep_ms(10)
+
+        # ---- Affichage toutes les _STATS_EVERY boucles ----
+        stats_ctr -= 1
+        if stats_ctr == 0:
+            stats_ctr = _STATS_EVERY
+            try:
+                print(_STATS_FMT % (
+                    loop_count, DETECTOR_ID, ok_count, nok_count, setid_ok_count, setid_err_count
+                ))
+            except Exception:
+                pass
+
+async def main():
+    try:
+        _uart_write_str("BOOT:{}\n".format(DETECTOR_ID))
     except Exception:
-        # protéger la boucle principale d'une exception UART/parse
         pass
+    led.value(0)
 
-    # ---- Affichage toutes les 100 boucles ----
-    if (loop_count % 1000) == 0:
-        try:
-            print("[{}] id={} ok={} nok={} setid_ok={} setid_err={}".format(
-                loop_count, DETECTOR_ID, ok_count, nok_count, setid_ok_count, setid_err_count
-            ))
-        except Exception:
-            pass
+    asyncio.create_task(led_task())
+    asyncio.create_task(wdt_feed_task())
+    await rx_task()
 
-    time.sleep_ms(10)
\ No newline at end of file
+asyncio.run(main())
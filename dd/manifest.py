@@ -0,0 +1,10 @@
+# manifest.py - Gel du Détecteur Distant (DD) dans le firmware
+# Usage (depuis ports/esp32 de MicroPython) :
+#   make BOARD=ESP32_GENERIC FROZEN_MANIFEST=/chemin/vers/dd/manifest.py
+#
+# main.py est compilé par mpy-cross et exécuté directement depuis la
+# flash : les const() sont repliées et le module n'occupe plus de heap.
+# config.py reste sur le système de fichiers (ID propre à chaque module).
+
+include("$(PORT_DIR)/boards/manifest.py")
+freeze(".", "main.py")
@@ -22,9 +22,10 @@ from ta_logger import get_logger
 
 logger = get_logger()
 
-# Valider la configuration au démarrage
-logger.info("Validation de la configuration...", "main")
-config.ConfigValidator.validate_or_exit()
+# Valider la configuration au démarrage (build de développement uniquement)
+if __debug__:
+    logger.info("Validation de la configuration...", "main")
+    config.ConfigValidator.validate_or_exit()
 
 async def _demo(app):
     """Mode démo pour tester les détecteurs"""
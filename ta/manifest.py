@@ -0,0 +1,11 @@
+# manifest.py - Gel de la configuration du Terminal Afficheur (TA)
+# Usage (depuis ports/esp32 de MicroPython) :
+#   make BOARD=ESP32_GENERIC_S3 FROZEN_MANIFEST=/chemin/vers/ta/manifest.py
+#
+# ta_config.py ne contient que des littéraux (couleurs RGB565 précalculées) :
+# une fois gelé, il est exécuté depuis la flash sans calcul au boot.
+# Attention : toggle_dev_mode.py modifie le fichier source, il faut donc
+# reconstruire le firmware après un changement de mode.
+
+include("$(PORT_DIR)/boards/manifest.py")
+freeze(".", "ta_config.py")
@@ -4,6 +4,7 @@ Improved with watchdog, better error handling, and stats
 """
 
 import ta_config as config
+from ta_config import POLL_PERIOD_MS, DIRTY_TRACKING, GROUP_IDS
 from ta_logger import get_logger
 
 try:
@@ -21,6 +22,9 @@ from ta_radio_433 import Radio, STATE_PRESENT, STATE_ABSENT, STATE_UNKNOWN
 
 logger = get_logger()
 
+# État radio -> état UI (tout autre état -> None, inconnu)
+_TRI = {STATE_PRESENT: True, STATE_ABSENT: False}
+
 class TaApp:
     def __init__(self, tft=None, ui=None, radio=None):
         logger.info("Initialisation de l'application DTD v{}".format(
@@ -28,9 +32,14 @@ class TaApp:
         
         self.ui = ui if ui else UI()
         self.radio = radio if radio else Radio()
-        self.states = {dd_id: STATE_UNKNOWN for dd_id in config.RADIO["GROUP_IDS"]}
+        # États indexés par position dans GROUP_IDS (1 octet par groupe)
+        n = len(GROUP_IDS)
+        self._states = bytearray([STATE_UNKNOWN] * n)
+        # Derniers états transmis à l'UI (0xFF = jamais rendu)
+        self._last_states = bytearray([0xFF] * n)
+        self._dirty_tracking = DIRTY_TRACKING
         self.testing_id = None
-        self.req_period = max(150, config.RADIO.get("POLL_PERIOD_MS", 1500))
+        self.req_period = max(150, POLL_PERIOD_MS)
         
         # Watchdog
         self.wdt = None
@@ -66,48 +75,6 @@ class TaApp:
         except Exception as e:
             logger.warning("set_testing erreur UI: {}".format(e), "app")
 
-    def _refresh_ui(self) -> None:
-        """Met à jour l'affichage avec dirty tracking"""
-        try:
-            for idx, dd_id in enumerate(config.RADIO["GROUP_IDS"]):
-                st = self.states.get(dd_id, STATE_UNKNOWN)
-                
-                if st == STATE_PRESENT:
-                    state = True
-                elif st == STATE_ABSENT:
-                    state = False
-                else:
-                    state = None
-                
-                self.ui.update_group(idx, state=state)
-            
-            # Rafraîchir uniquement les éléments modifiés
-            if config.UI.get("DIRTY_TRACKING", True):
-                self.ui.render_dirty()
-        except Exception as e:
-            logger.error("_refresh_ui erreur: {}".format(e), "app")
-            self.error_count += 1
-
-    def _update_states(self) -> None:
-        """Lit les états depuis la radio"""
-        try:
-            for st in self.radio.poll_status():
-                self.states[st.dd_id] = st.state
-        except Exception as e:
-            logger.error("_update_states erreur: {}".format(e), "app")
-            self.error_count += 1
-
-    async def _handle_testing(self) -> None:
-        """Gère la requête rapide si test actif"""
-        try:
-            if self.testing_id:
-                self.radio.request_status(self.testing_id)
-                await asyncio.sleep_ms(self.req_period)
-            else:
-                await asyncio.sleep_ms(200)
-        except Exception as e:
-            logger.error("_handle_testing erreur: {}".format(e), "app")
-
     async def _print_stats(self):
         """Tâche périodique pour afficher les statistiques"""
         if not config.MAIN.get("DEBUG_MODE", False):
@@ -139,17 +106,50 @@ class TaApp:
         if config.MAIN.get("DEBUG_MODE", False):
             asyncio.create_task(self._print_stats())
         
+        # Vérification du module radio (non bloquante)
+        try:
+            await self.radio.start()
+        except Exception as e:
+            logger.error("Erreur démarrage radio: {}".format(e), "app")
+        
+        # Références locales pour la boucle
+        radio = self.radio
+        ui = self.ui
+        states = self._states
+        last = self._last_states
+        tri = _TRI
+
+        # Lecture radio, rafraîchissement UI et test rapide fusionnés :
+        # un seul try et un seul await par cycle
         while True:
             try:
                 # Alimenter watchdog
                 self.feed_watchdog()
                 
-                # Traitement principal
-                self._update_states()
-                self._refresh_ui()
-                await self._handle_testing()
-                
+                # Lire les états depuis la radio (mêmes index que GROUP_IDS)
+                if await radio.poll_status():
+                    dd_state = radio.dd_state
+                    for i in range(len(states)):
+                        s = dd_state[i]
+                        # Valeur hors table _TRI -> inconnu
+                        states[i] = s if s in tri else STATE_UNKNOWN
+
+                # Mettre à jour l'affichage (groupes modifiés uniquement)
+                for idx, st in enumerate(states):
+                    if st == last[idx]:
+                        continue
+                    last[idx] = st
+                    ui.update_group(idx, state=tri.get(st))
+                if self._dirty_tracking:
+                    ui.render_dirty()
+
+                # Requête rapide si test actif
+                testing_id = self.testing_id
+                if testing_id:
+                    await radio.request_status(testing_id)
+
                 self.loop_count += 1
+                await asyncio.sleep_ms(self.req_period if testing_id else 200)
                 
             except Exception as e:
                 logger.critical("Erreur critique dans boucle principale: {}".format(e), "app")
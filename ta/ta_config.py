@@ -11,12 +11,25 @@ v1.0.1 : 23.10.2025 --> add radio/uart pins for GT38 + board/display metadata
 v2.0.0 : 24.10.2025 --> improved config with validation and power management
 """
 
-import st7789
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
 
 __app_name__   = "DTD"
 __version_no__ = "2.0.0"
 __version_date__ = "24.10.2025"
 
+# ---------------------------------------------------------------------------
+# Valeurs lues dans la boucle principale : exposées au niveau module pour un
+# import direct (from ta_config import ...), sans chaîne de lookups de dict.
+# Les dicts ci-dessous y font référence (compatibilité).
+# ---------------------------------------------------------------------------
+POLL_PERIOD_MS = const(1500)
+DIRTY_TRACKING = const(1)       # 1 = optimisation dirty tracking active
+GROUP_IDS = [1, 2, 3, 4, 5]     # groupes testés
+
 # ---------------------------------------------------------------------------
 # Matériel / carte / écran
 # ---------------------------------------------------------------------------
@@ -87,22 +100,24 @@ UI = {
     
     # Rafraîchissement
     "REFRESH_RATE_MS": 100,     # Période de rafraîchissement UI
-    "DIRTY_TRACKING": True,     # Active l'optimisation dirty tracking
+    "DIRTY_TRACKING": DIRTY_TRACKING,  # Active l'optimisation dirty tracking
 }
 
+# Couleurs RGB565 précalculées : ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+# (identique à st7789.color565, sans dépendance au driver ni calcul au boot)
 COLORS = {
-    "C_BLACK": st7789.BLACK,
-    "C_WHITE": st7789.WHITE,
-    "C_BG":    st7789.color565(0, 0, 0),
-    "C_HDR":   st7789.color565(0, 64, 200),
-    "C_STS":   st7789.color565(200, 200, 0),
-    "C_ERR":   st7789.color565(255, 0, 0),
-    "C_WARN":  st7789.color565(255, 160, 0),
-    "C_ON":    st7789.color565(0, 200, 0),
-    "C_OFF":   st7789.color565(200, 0, 0),
-    "C_UNK":   st7789.color565(120, 120, 120),
-    "C_BOX":   st7789.color565(60, 60, 60),
-    "C_PGR":   st7789.color565(255, 127, 0),
+    "C_BLACK": 0x0000,  # st7789.BLACK
+    "C_WHITE": 0xFFFF,  # st7789.WHITE
+    "C_BG":    0x0000,  # (0, 0, 0)
+    "C_HDR":   0x0219,  # (0, 64, 200)
+    "C_STS":   0xCE40,  # (200, 200, 0)
+    "C_ERR":   0xF800,  # (255, 0, 0)
+    "C_WARN":  0xFD00,  # (255, 160, 0)
+    "C_ON":    0x0640,  # (0, 200, 0)
+    "C_OFF":   0xC800,  # (200, 0, 0)
+    "C_UNK":   0x7BCF,  # (120, 120, 120)
+    "C_BOX":   0x39E7,  # (60, 60, 60)
+    "C_PGR":   0xFBE0,  # (255, 127, 0)
 }
 
 TEXTS = {
@@ -127,10 +142,10 @@ RADIO = {
     "SIMULATE": True,
 
     # Groupes testés
-    "GROUP_IDS": [1, 2, 3, 4, 5],
+    "GROUP_IDS": GROUP_IDS,
 
     # Temporisations
-    "POLL_PERIOD_MS": 1500,
+    "POLL_PERIOD_MS": POLL_PERIOD_MS,
     "REPLY_TIMEOUT_MS": 500,
 
     # Retry configuration
@@ -284,8 +299,9 @@ class ConfigValidator:
             print("[config] Validation OK: configuration valide")
 
 
-# Valider au chargement du module (peut être désactivé si nécessaire)
-if __name__ != "__main__":
+# Valider au chargement du module, uniquement en build de développement :
+# mpy-cross -O1 (ou plus) met __debug__ à False et supprime ce bloc
+if __debug__ and __name__ != "__main__":
     # Validation silencieuse au chargement
     errors = ConfigValidator.validate()
     if errors:
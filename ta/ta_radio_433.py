@@ -26,6 +26,7 @@ except Exception:
         def write(self, b): return len(b)
         def any(self): return 0
         def read(self, n): return b""
+        def readinto(self, buf, n=None): return 0
 
 try:
     import uasyncio as asyncio
@@ -33,6 +34,12 @@ except Exception:
     import asyncio
 
 import time
+from array import array
+try:
+    from micropython import const
+except ImportError:
+    def const(x):
+        return x
 try:
     import urandom as _rand
 except Exception:
@@ -55,6 +62,9 @@ STATE_UNKNOWN = RAD["STATE_UNKNOWN"]
 STATE_PRESENT = RAD["STATE_PRESENT"]
 STATE_ABSENT = RAD["STATE_ABSENT"]
 
+# Payloads d'état 1 octet pour les réponses simulées (pas d'allocation par poll)
+_STATE_BYTES = {s: bytes([s]) for s in (STATE_PRESENT, STATE_ABSENT, STATE_UNKNOWN)}
+
 FRAME = RAD["FRAME"]
 START_BYTE = FRAME["START_BYTE"]
 END_BYTE = FRAME["END_BYTE"]
@@ -63,6 +73,9 @@ MAX_LEN = FRAME["MAX_LEN"]
 
 RETRY_CFG = RAD["RETRY"]
 
+# Évite le format() des logs debug sur le chemin de retry en production
+DEBUG_ENABLED = bool(config.MAIN.get("DEBUG_MODE", False))
+
 # Outils
 def _ticks():
     return time.ticks_ms()
@@ -70,9 +83,6 @@ def _ticks():
 def _diff(a, b):
     return time.ticks_diff(a, b)
 
-def _sleep_ms(ms):
-    time.sleep_ms(ms)
-
 def _randbits(n=1):
     try:
         return _rand.getrandbits(n)
@@ -80,15 +90,78 @@ def _randbits(n=1):
         return int(_rand.random() * (1 << n))
 
 # Trames
-CMD_PING = 0x10
-CMD_GET_STS = 0x20
-CMD_SET_MODE = 0x30
+# Codes commande littéraux : const() les replie dans le bytecode.
+# START/END/VER/MAX_LEN et STATE_* viennent de ta_config (dicts) et ne
+# peuvent pas être repliés par le compilateur.
+CMD_PING = const(0x10)
+CMD_GET_STS = const(0x20)
+CMD_SET_MODE = const(0x30)
+
+# XOR des octets du payload, recherche d'octet et contrôle des trames
+# reçues : code natif (Viper) sur MicroPython, repli en Python pur ailleurs
+# (tests sur PC). bytearray.find n'existe pas sur MicroPython.
+try:
+    import micropython
+
+    @micropython.viper
+    def _find_byte(buf, b: int, start: int, end: int) -> int:
+        # position de l'octet b dans buf[start:end] ; -1 si absent
+        p = ptr8(buf)
+        i = start
+        while i < end:
+            if p[i] == b:
+                return i
+            i += 1
+        return -1
+
+    @micropython.viper
+    def _xor_bytes(s: int, buf, n: int) -> int:
+        p = ptr8(buf)
+        i = 0
+        while i < n:
+            s ^= p[i]
+            i += 1
+        return s & 0xFF
+
+    @micropython.viper
+    def _frame_check(buf, n: int) -> int:
+        # longueur + checksum ; (cmd << 16) | (gid << 8) | ln, ou -1
+        p = ptr8(buf)
+        ln = int(p[4])
+        if 7 + ln != n:
+            return -1
+        s = int(p[1]) ^ int(p[2]) ^ int(p[3]) ^ ln
+        i = 5
+        while i < 5 + ln:
+            s ^= p[i]
+            i += 1
+        if (s & 0xFF) != int(p[5 + ln]):
+            return -1
+        return (int(p[2]) << 16) | (int(p[3]) << 8) | ln
+except (ImportError, AttributeError):
+    def _find_byte(buf, b, start, end):
+        for i in range(start, end):
+            if buf[i] == b:
+                return i
+        return -1
+
+    def _xor_bytes(s, buf, n):
+        for i in range(n):
+            s ^= buf[i]
+        return s & 0xFF
+
+    def _frame_check(buf, n):
+        ln = buf[4]
+        if 7 + ln != n:
+            return -1
+        if _xor_bytes(buf[1] ^ buf[2] ^ buf[3] ^ ln, buf[5:5+ln], ln) != buf[5+ln]:
+            return -1
+        return (buf[2] << 16) | (buf[3] << 8) | ln
 
 def _chk(ver, cmd, grp, payload):
-    s = (ver ^ cmd ^ (grp & 0xFF) ^ len(payload)) & 0xFF
-    for b in payload:
-        s ^= (b & 0xFF)
-    return s & 0xFF
+    n = len(payload)
+    # les 4 octets d'en-tête sont combinés hors de la boucle
+    return _xor_bytes((ver ^ cmd ^ (grp & 0xFF) ^ n) & 0xFF, payload, n)
 
 def _mk_frame(cmd, gid=0, payload=b""):
     if payload is None:
@@ -98,25 +171,30 @@ def _mk_frame(cmd, gid=0, payload=b""):
     ver = PROTO_VER & 0xFF
     gid = gid & 0xFF
     ln = len(payload) & 0xFF
-    chk = _chk(ver, cmd, gid, payload)
-    return bytes([START_BYTE, ver, cmd, gid, ln]) + payload + bytes([chk, END_BYTE])
+    # une seule allocation, remplie à offsets fixes (uart.write accepte un bytearray)
+    buf = bytearray(7 + ln)
+    buf[0] = START_BYTE
+    buf[1] = ver
+    buf[2] = cmd
+    buf[3] = gid
+    buf[4] = ln
+    if ln:
+        buf[5:5+ln] = payload
+    buf[5+ln] = _chk(ver, cmd, gid, payload)
+    buf[6+ln] = END_BYTE
+    return buf
 
 def _parse_frame(buf):
     if not buf or len(buf) < 7:
         return None
     if buf[0] != START_BYTE or buf[-1] != END_BYTE:
         return None
-    ver = buf[1]
-    cmd = buf[2]
-    gid = buf[3]
-    ln = buf[4]
-    if 5 + ln + 2 != len(buf):
-        return None
-    payload = buf[5:5+ln]
-    chk = buf[5+ln]
-    if _chk(ver, cmd, gid, payload) != chk:
+    v = _frame_check(buf, len(buf))
+    if v < 0:
         return None
-    return (cmd, gid, payload)
+    # payload extrait seulement pour une trame valide
+    ln = v & 0xFF
+    return (v >> 16, (v >> 8) & 0xFF, buf[5:5+ln])
 
 # Statistiques
 class RadioStats:
@@ -161,16 +239,6 @@ class RadioStats:
             self.timeouts, self.avg_rssi,
             self.get_success_rate())
 
-# Structure DDStatus
-class DDStatus:
-    __slots__ = ("dd_id", "state", "battery", "rssi", "flags")
-    def __init__(self, dd_id, state, battery=100, rssi=0, flags=0):
-        self.dd_id = int(dd_id)
-        self.state = int(state)
-        self.battery = int(battery)
-        self.rssi = int(rssi)
-        self.flags = int(flags)
-
 # Radio améliorée
 class Radio:
     def __init__(self):
@@ -178,15 +246,36 @@ class Radio:
         self._tick = 0
         self._sim_states = {gid: (STATE_PRESENT if (_randbits(1) == 1) else STATE_ABSENT) for gid in GROUP_IDS}
         
+        # États des DD en tableaux parallèles indexés comme GROUP_IDS
+        # (remplis en place par poll_status, aucun objet alloué par poll)
+        n = len(GROUP_IDS)
+        self.dd_ids = array("H", GROUP_IDS)
+        self.dd_state = array("B", [STATE_UNKNOWN] * n)
+        self.dd_battery = array("B", [100] * n)
+        self.dd_rssi = array("h", [0] * n)
+        self.dd_flags = array("B", [0] * n)
+        
         # Stats
         self.stats = RadioStats() if RAD.get("STATS_ENABLED", True) else None
         
-        # Cache pour frames
+        # Cache pour frames sans payload, clé (cmd << 8) | gid
         self._frame_cache = {}
+        for cmd, gid in [(CMD_PING, 0), (CMD_SET_MODE, 0)] + [(CMD_GET_STS, g) for g in GROUP_IDS]:
+            self._frame_cache[(cmd << 8) | (gid & 0xFF)] = _mk_frame(cmd, gid, b"")
         
         # Buffers pré-alloués
         self._rx_buffer = bytearray(MAX_LEN)
         
+        # Un seul UART half-duplex : un échange à la fois
+        self._lock = asyncio.Lock()
+        
+        # Paramètres de retry précalculés (timeouts et backoff par tentative)
+        self._max_retries = int(RETRY_CFG["MAX_RETRIES"])
+        self._backoff_enabled = bool(RETRY_CFG["BACKOFF_ENABLED"])
+        self._timeout_table = [int(RETRY_CFG["TIMEOUT_BASE_MS"] * (RETRY_CFG["TIMEOUT_MULTIPLIER"] ** i))
+                               for i in range(self._max_retries)]
+        self._backoff_table = [RETRY_CFG["BACKOFF_MS"] * (i + 1) for i in range(self._max_retries)]
+        
         # Pin SET
         try:
             self.pin_set = Pin(PIN_SET, Pin.OUT)
@@ -205,11 +294,6 @@ class Radio:
                                rx=UART_C["RX"],
                                timeout=UART_C["TIMEOUT_MS"])
                 logger.info("UART initialisé", "radio")
-                
-                # Vérifier hardware
-                if not self.check_hardware():
-                    logger.error("Module GT38 introuvable, basculement en simulation", "radio")
-                    self.simulate = True
             except Exception as e:
                 logger.error("Erreur init UART: {}, basculement en simulation".format(e), "radio")
                 self.simulate = True
@@ -217,6 +301,15 @@ class Radio:
         if self.simulate:
             logger.info("Mode simulation actif", "radio")
     
+    async def start(self):
+        """Vérifie le module GT38 (à appeler une fois depuis la boucle asyncio)"""
+        if self.simulate:
+            return
+        if not await self.check_hardware():
+            logger.error("Module GT38 introuvable, basculement en simulation", "radio")
+            self.simulate = True
+            logger.info("Mode simulation actif", "radio")
+    
     def run_mode(self):
         if self.pin_set:
             self.pin_set.value(1)
@@ -239,126 +332,167 @@ class Radio:
                 self.stats.update_tx(False)
             return 0
     
-    def _read_all(self) -> bytes:
+    def _read_into(self, mv) -> int:
+        """Lit les octets disponibles dans mv (sans allocation), retourne le nombre lu"""
         if self.simulate or not self.uart:
-            return b""
+            return 0
         try:
             n = self.uart.any()
             if not n:
-                return b""
-            data = self.uart.read(n) or b""
-            if self.stats and data:
+                return 0
+            n = self.uart.readinto(mv, min(n, len(mv))) or 0
+            if self.stats and n:
                 self.stats.update_rx(True)
-            return data
+            return n
         except Exception as e:
             logger.error("Erreur lecture UART: {}".format(e), "radio")
             if self.stats:
                 self.stats.update_rx(False)
-            return b""
+            return 0
     
-    def _exchange_with_retry(self, cmd, gid, payload=b""):
+    async def _exchange_with_retry(self, cmd, gid, payload=b""):
         """Envoie avec retry exponentiel"""
-        for attempt in range(RETRY_CFG["MAX_RETRIES"]):
-            timeout = int(RETRY_CFG["TIMEOUT_BASE_MS"] *
-                         (RETRY_CFG["TIMEOUT_MULTIPLIER"] ** attempt))
-            
-            result = self._exchange(cmd, gid, payload, timeout)
+        max_retries = self._max_retries
+        for attempt in range(max_retries):
+            result = await self._exchange_async(cmd, gid, payload, self._timeout_table[attempt])
             if result:
                 return result
             
-            logger.debug("Tentative {}/{} échouée pour DD {}".format(
-                attempt + 1, RETRY_CFG["MAX_RETRIES"], gid), "radio")
+            if DEBUG_ENABLED:
+                logger.debug("Tentative {}/{} échouée pour DD {}".format(
+                    attempt + 1, max_retries, gid), "radio")
             
-            if RETRY_CFG["BACKOFF_ENABLED"] and attempt < RETRY_CFG["MAX_RETRIES"] - 1:
-                backoff = RETRY_CFG["BACKOFF_MS"] * (attempt + 1)
-                _sleep_ms(backoff)
+            if self._backoff_enabled and attempt < max_retries - 1:
+                await asyncio.sleep_ms(self._backoff_table[attempt])
         
         logger.warning("Échec après {} tentatives pour DD {}".format(
-            RETRY_CFG["MAX_RETRIES"], gid), "radio")
+            max_retries, gid), "radio")
         return None
     
-    def _exchange(self, cmd, gid, payload=b"", timeout_ms=REPLY_TIMEOUT_MS):
+    async def _exchange_async(self, cmd, gid, payload=b"", timeout_ms=REPLY_TIMEOUT_MS):
         if self.simulate:
+            # un seul tirage (small int, < 2**30), découpé par masques/décalages
+            r = _randbits(16)
             if cmd == CMD_PING:
-                _sleep_ms(50 + (_randbits(6) & 0x3F))
+                await asyncio.sleep_ms(50 + (r & 0x3F))
                 return (CMD_PING, gid, b"OK")
             elif cmd == CMD_GET_STS:
-                _sleep_ms(50 + (_randbits(7)))  # Réduit de 1.5s à ~150ms max
+                await asyncio.sleep_ms(50 + (r & 0x7F))  # Réduit de 1.5s à ~150ms max
                 st = self._sim_states.get(gid, STATE_UNKNOWN)
-                if (_randbits(4) == 0) and st != STATE_UNKNOWN:
+                if (((r >> 7) & 0x0F) == 0) and st != STATE_UNKNOWN:
                     st = STATE_PRESENT if (st == STATE_ABSENT) else STATE_ABSENT
                     self._sim_states[gid] = st
-                return (CMD_GET_STS, gid, bytes([st]))
+                return (CMD_GET_STS, gid, _STATE_BYTES[st])
             elif cmd == CMD_SET_MODE:
                 return (CMD_SET_MODE, gid, b"ACK")
             return None
         
         # Matériel réel
-        frame = _mk_frame(cmd, gid, payload)
+        async with self._lock:
+            return await self._exchange_hw(cmd, gid, payload, timeout_ms)
+    
+    async def _exchange_hw(self, cmd, gid, payload, timeout_ms):
+        frame = None if payload else self._frame_cache.get((cmd << 8) | (gid & 0xFF))
+        if frame is None:
+            frame = _mk_frame(cmd, gid, payload)
         self._write(frame)
         
+        # Réception dans le buffer pré-alloué : octets valides dans buf[:pos]
+        buf = self._rx_buffer
+        mv = memoryview(buf)
+        pos = 0
         t0 = _ticks()
-        buf = b""
         while _diff(_ticks(), t0) < timeout_ms:
-            chunk = self._read_all()
-            if chunk:
-                buf += chunk
-                s = buf.find(bytes([START_BYTE]))
-                e = buf.find(bytes([END_BYTE]), s+1)
-                if s >= 0 and e > s:
-                    pkt = buf[s:e+1]
-                    parsed = _parse_frame(pkt)
+            n = self._read_into(mv[pos:])
+            if n:
+                pos += n
+                while True:
+                    s = _find_byte(buf, START_BYTE, 0, pos)
+                    if s < 0:
+                        pos = 0
+                        break
+                    if s > 0:
+                        # ignorer les octets avant START
+                        buf[:pos-s] = buf[s:pos]
+                        pos -= s
+                    e = _find_byte(buf, END_BYTE, 1, pos)
+                    if e < 0:
+                        break
+                    # copie du paquet : le buffer est réutilisé au prochain échange
+                    parsed = _parse_frame(bytes(mv[:e+1]))
                     if parsed:
                         return parsed
-            _sleep_ms(5)
+                    # trame invalide : resynchroniser après ce START
+                    buf[:pos-1] = buf[1:pos]
+                    pos -= 1
+                if pos == MAX_LEN:
+                    # buffer plein sans END : abandon
+                    pos = 0
+            # attente coopérative : l'UI et les boutons continuent de tourner
+            await asyncio.sleep_ms(5)
         
         if self.stats:
             self.stats.update_timeout()
         return None
     
-    def poll_status(self):
-        out = []
+    async def poll_status(self):
+        """
+        Interroge les DD au rythme de POLL_PERIOD_MS.
+        
+        Les résultats sont écrits dans dd_state, dd_battery, dd_rssi et
+        dd_flags (indexés comme GROUP_IDS).
+        
+        Returns:
+            bool: True si un cycle de poll a eu lieu à ce tick
+        """
         self._tick += 1
         period = max(1, int(POLL_PERIOD_MS // 200) or 1)
-        if (self._tick % period) == 0:
-            for gid in GROUP_IDS:
-                if self.simulate:
-                    st = self._sim_states.get(gid, STATE_UNKNOWN)
-                    batt = 75 + (_randbits(5) % 25)
-                    rssi = 110 - (_randbits(5) % 30)
+        if (self._tick % period) != 0:
+            return False
+        for i, gid in enumerate(GROUP_IDS):
+            if self.simulate:
+                st = self._sim_states.get(gid, STATE_UNKNOWN)
+                r = _randbits(16)
+                batt = 75 + ((r & 0x1F) % 25)
+                rssi = 110 - (((r >> 8) & 0x1F) % 30)
+            else:
+                # séquentiel : les DD partagent le même canal radio
+                resp = await self._exchange_with_retry(CMD_GET_STS, gid)
+                if resp and resp[0] == CMD_GET_STS and len(resp[2]) == 1:
+                    st = resp[2][0]
                 else:
-                    resp = self._exchange_with_retry(CMD_GET_STS, gid)
-                    if resp and resp[0] == CMD_GET_STS and len(resp[2]) == 1:
-                        st = resp[2][0]
-                    else:
-                        st = STATE_UNKNOWN
-                    batt = 90
-                    rssi = 90
-                out.append(DDStatus(gid, st, batt, rssi, 0))
-        return out
+                    st = STATE_UNKNOWN
+                batt = 90
+                rssi = 90
+            self.dd_state[i] = st
+            self.dd_battery[i] = batt
+            self.dd_rssi[i] = rssi
+            self.dd_flags[i] = 0
+        return True
     
-    def request_status(self, dd_id: int):
+    async def request_status(self, dd_id: int):
         if dd_id not in GROUP_IDS:
             return STATE_UNKNOWN
-        resp = self._exchange_with_retry(CMD_GET_STS, dd_id)
+        resp = await self._exchange_with_retry(CMD_GET_STS, dd_id)
         if resp and resp[0] == CMD_GET_STS and len(resp[2]) == 1:
             return resp[2][0]
         return STATE_UNKNOWN
     
-    def ping(self) -> bool:
-        resp = self._exchange(CMD_PING, 0)
+    async def ping(self) -> bool:
+        resp = await self._exchange_async(CMD_PING, 0)
         return bool(resp and resp[0] == CMD_PING and resp[2] == b"OK")
     
-    def check_hardware(self):
+    async def check_hardware(self):
         """Vérifie que le module GT38 répond"""
         if self.simulate:
             return True
         
+        # sondes séquentielles : l'UART half-duplex ne permet qu'un échange à
+        # la fois ; arrêt dès la première réponse
         for _ in range(3):
-            if self.ping():
+            if await self.ping():
                 logger.info("Module GT38 détecté", "radio")
                 return True
-            _sleep_ms(100)
         
         logger.error("Module GT38 introuvable", "radio")
         return False
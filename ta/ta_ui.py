@@ -5,11 +5,24 @@ Optimized with dirty tracking and better resource management
 
 import sys, utime
 import st7789
+try:
+    from collections import deque
+except ImportError:
+    from ucollections import deque
 import ta_config as config
 from ta_logger import get_logger
 
 logger = get_logger()
 
+# Bits de modification par groupe (dirty tracking)
+DIRTY_LABEL = 1
+DIRTY_STATE = 2
+DIRTY_BATT = 4
+DIRTY_RSSI = 8
+
+# Textes d'état : 0 = ON, 1 = OFF, 2 = UNK (voir _draw_group_state)
+_STATE_TXT = ("ON", "OFF", "UNK")
+
 if "utils" not in sys.path:
     sys.path.append("utils")
 
@@ -29,8 +42,16 @@ class UI:
     C_UNK = config.COLORS["C_UNK"]
     C_BOX = config.COLORS["C_BOX"]
 
+    # Couleur de bande par état (1/0 sont confondus avec True/False)
+    _STATE_COLOR_MAP = {
+        True: C_ON, "on": C_ON, "ON": C_ON,
+        False: C_OFF, "off": C_OFF, "OFF": C_OFF,
+    }
+
     def __init__(self, rotation=1, buffer_size=64*64*2, bl_gpio=None, bl_percent=85, group_labels=None):
         self.tft = tft_config.config(rotation, buffer_size=buffer_size)
+        # Contour en un seul appel si le driver le fournit
+        self._rect = getattr(self.tft, "rect", None)
         self._init_done = False
         self.init()
 
@@ -48,18 +69,21 @@ class UI:
         self.CONTENT_Y = self.HEADER_H + self.PAD + self.PROGRESS_EXTRA_GAP
 
         self.LOG_MAX = 6
-        self.log_buf = []
+        self.log_buf = deque((), self.LOG_MAX)   # borné : append sans copie
 
         self.group_count = 5
         self.groups = [{"label": f"G{i+1}", "state": None, "battery": 100, "rssi": 0} for i in range(self.group_count)]
         if group_labels:
-            self.set_groups(group_labels)
+            # Labels seuls : l'affichage est fait plus bas par _show_groups_initial()
+            for i in range(min(len(group_labels), self.group_count)):
+                self.groups[i]["label"] = str(group_labels[i])
         self._layout_groups()
 
         # Dirty tracking
         self._dirty_tracking = config.UI.get("DIRTY_TRACKING", True)
         self._group_states_cache = [None] * self.group_count
-        self._dirty_groups = set()
+        self._dirty_mask = 0        # bit i : groupe i à rafraîchir
+        self._dirty_label_mask = 0  # bit i : groupe i à redessiner en entier
 
         if bl_gpio is not None:
             try:
@@ -71,7 +95,7 @@ class UI:
         self.header(config.MAIN["APP_NAME"])
         self._indicator_clear()
         self.status("Prêt")
-        self.show_groups()
+        self._show_groups_initial()
         self.message("En attente…", y=self.grp_bottom + self.PAD)
         
         logger.info("UI initialisée ({}x{})".format(self.W, self.H), "ui")
@@ -95,12 +119,13 @@ class UI:
         bg = self.C_BG if bg is None else bg
         self.tft.text(font, str(s), int(x), int(y), fg, bg)
 
-    def _text_center(self, s, cx, y, fg=None, bg=None):
-        s = str(s)
-        w = self.FW * len(s)
-        self._text(s, max(0, int(cx - w//2)), int(y), fg, bg)
+    def _center_x(self, s, cx):
+        return max(0, int(cx - (self.FW * len(s))//2))
 
     def _frame(self, x, y, w, h, color):
+        if self._rect:
+            self._rect(x, y, w, h, color)
+            return
         self.tft.fill_rect(x, y, w, 1, color)
         self.tft.fill_rect(x, y+h-1, w, 1, color)
         self.tft.fill_rect(x, y, 1, h, color)
@@ -146,86 +171,136 @@ class UI:
         usable_w = self.W - 2*self.PAD
         box_w = (usable_w - (self.group_count - 1) * gap) // self.group_count
         self.grp_boxes = []
+        # Par groupe : (cx, y du label, y de l'état), invariants après layout
+        self.grp_meta = []
+        # Par groupe : x du texte d'état pour chaque entrée de _STATE_TXT
+        self._state_x = []
         x = self.PAD
         for _ in range(self.group_count):
+            cx = x + box_w//2
             self.grp_boxes.append((x, self.grp_y, box_w, self.grp_h))
+            self.grp_meta.append((cx, self.grp_y + self.FH + 4, self.grp_y + self.grp_h - self.FH - 2))
+            self._state_x.append(tuple(self._center_x(t, cx) for t in _STATE_TXT))
             x += box_w + gap
+        self._fit_label = [None] * self.group_count
+        self._label_x = [0] * self.group_count
+        for i in range(self.group_count):
+            self._fit_group_label(i)
+
+    def _fit_group_label(self, i):
+        """Met en cache le label ajusté du groupe i et sa position x"""
+        label_fit = self._fit_text(self.groups[i]["label"], self.grp_boxes[i][2] - 6)
+        self._fit_label[i] = label_fit
+        self._label_x[i] = self._center_x(label_fit, self.grp_meta[i][0])
 
     def set_groups(self, labels):
         n = min(len(labels), self.group_count)
         for i in range(n):
             self.groups[i]["label"] = str(labels[i])
+            self._fit_group_label(i)
         self.show_groups()
 
     def _state_color(self, state):
-        if state in (True, "on", "ON", 1):
-            return self.C_ON
-        if state in (False, "off", "OFF", 0):
-            return self.C_OFF
-        return self.C_UNK
+        return self._STATE_COLOR_MAP.get(state, self.C_UNK)
 
     def update_group(self, index, state=None, label=None, battery=None, rssi=None):
         if not (0 <= index < self.group_count):
             return
         
-        changed = False
+        changed = 0
         
         if label is not None and self.groups[index]["label"] != label:
             self.groups[index]["label"] = str(label)
-            changed = True
+            self._fit_group_label(index)
+            changed |= DIRTY_LABEL
         
         if state is not None and self._group_states_cache[index] != state:
             self.groups[index]["state"] = state
             self._group_states_cache[index] = state
-            changed = True
+            changed |= DIRTY_STATE
         
         if battery is not None:
             self.groups[index]["battery"] = battery
-            changed = True
+            changed |= DIRTY_BATT
         
         if rssi is not None:
             self.groups[index]["rssi"] = rssi
-            changed = True
+            changed |= DIRTY_RSSI
         
         if changed:
             if self._dirty_tracking:
-                self._dirty_groups.add(index)
+                bit = 1 << index
+                self._dirty_mask |= bit
+                if changed & DIRTY_LABEL:
+                    self._dirty_label_mask |= bit
             else:
-                self._draw_group(index)
+                self._draw_group(index, changed)
 
     def show_groups(self):
         for i in range(self.group_count):
-            self._draw_group(i)
+            self._draw_group_full(i)
+
+    def _show_groups_initial(self):
+        """Premier affichage : l'écran vient d'être effacé par clear(), fond inutile"""
+        for i in range(self.group_count):
+            self._draw_group_overlay(i)
 
     def render_dirty(self):
         """Rafraîchit uniquement les groupes modifiés"""
-        for i in self._dirty_groups:
-            self._draw_group(i)
-        self._dirty_groups.clear()
+        mask = self._dirty_mask
+        full = self._dirty_label_mask
+        self._dirty_mask = 0
+        self._dirty_label_mask = 0
+        # Parcours bit à bit (int.bit_length absent de MicroPython)
+        i = 0
+        while mask:
+            if mask & 1:
+                if full & 1:
+                    self._draw_group_full(i)
+                else:
+                    self._draw_group_state(i)
+            mask >>= 1
+            full >>= 1
+            i += 1
+
+    def _draw_group(self, i, bits):
+        # Le label impose un redessin complet ; sinon seule la zone d'état change
+        if bits & DIRTY_LABEL:
+            self._draw_group_full(i)
+        else:
+            self._draw_group_state(i)
 
-    def _draw_group(self, i):
+    def _draw_group_full(self, i):
         x, y, w, h = self.grp_boxes[i]
-        g = self.groups[i]
-        label = g["label"]
-        state = g["state"]
-        col = self._state_color(state)
-
         self.tft.fill_rect(x, y, w, h, self.C_BG)
+        self._draw_group_overlay(i)
+
+    def _draw_group_overlay(self, i):
+        """Cadre, label et état du groupe, sans effacer le fond"""
+        x, y, w, h = self.grp_boxes[i]
+        y_label = self.grp_meta[i][1]
+
         self._frame(x, y, w, h, self.C_BOX)
 
-        self.tft.fill_rect(x+1, y+1, w-2, self.FH, col)
+        self._text(self._fit_label[i], self._label_x[i], y_label, self.C_WHITE, self.C_BG)
+        self._draw_group_state(i, clear=False)
+
+    def _draw_group_state(self, i, clear=True):
+        """Redessine la bande de couleur et le texte ON/OFF/UNK du groupe"""
+        x, y, w, h = self.grp_boxes[i]
+        y_state = self.grp_meta[i][2]
+        col = self._state_color(self.groups[i]["state"])
 
-        cx = x + w//2
-        label_fit = self._fit_text(label, w - 6)
-        self._text_center(label_fit, cx, y + self.FH + 4, self.C_WHITE, self.C_BG)
+        self.tft.fill_rect(x+1, y+1, w-2, self.FH, col)
 
-        stxt = "ON" if col == self.C_ON else ("OFF" if col == self.C_OFF else "UNK")
-        self._text_center(stxt, cx, y + h - self.FH - 2, self.C_WHITE, self.C_BG)
+        if clear:
+            # Effacer l'ancien texte (largeurs différentes ON/OFF/UNK)
+            self.tft.fill_rect(x+1, y_state, w-2, self.FH, self.C_BG)
+        kind = 0 if col == self.C_ON else (1 if col == self.C_OFF else 2)
+        self._text(_STATE_TXT[kind], self._state_x[i][kind], y_state, self.C_WHITE, self.C_BG)
 
     def log_add(self, line):
         self.log_buf.append(str(line))
-        if len(self.log_buf) > self.LOG_MAX:
-            self.log_buf = self.log_buf[-self.LOG_MAX:]
         self.log_draw()
 
     def log_draw(self):
@@ -237,8 +312,12 @@ class UI:
         y = top
         line_h = self.FH + 1
         max_lines = zone_h // line_h
-        lines_to_show = self.log_buf[-max_lines:] if len(self.log_buf) > max_lines else self.log_buf
-        for s in lines_to_show:
+        # Afficher les max_lines dernières lignes sans copier le buffer
+        skip = len(self.log_buf) - max_lines
+        for s in self.log_buf:
+            if skip > 0:
+                skip -= 1
+                continue
             self._text(s, self.PAD, y, self.C_WHITE, self.C_BG)
             y += line_h
 
@@ -4,30 +4,56 @@ Bascule entre mode DEV et PRODUCTION
 Usage: python toggle_dev_mode.py [dev|prod]
 """
 
+import ast
 import sys
 
+# Valeurs à appliquer par mode (clés des dicts de ta_config.py)
+MODES = {
+    'dev': {"DEV_MODE": True, "DEBUG_MODE": True, "WATCHDOG_ENABLED": False},
+    'prod': {"DEV_MODE": False, "DEBUG_MODE": False, "WATCHDOG_ENABLED": True},
+}
+
+def _find_values(tree, keys):
+    """Retourne les (clé, noeud valeur) booléens des dicts littéraux pour les clés demandées"""
+    found = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Dict):
+            continue
+        for k, v in zip(node.keys, node.values):
+            if (isinstance(k, ast.Constant) and k.value in keys
+                    and isinstance(v, ast.Constant) and isinstance(v.value, bool)):
+                found.append((k.value, v))
+    return found
+
 def toggle_mode(mode):
-    with open('ta_config.py', 'r') as f:
+    with open('ta_config.py', 'r', encoding='utf-8') as f:
         content = f.read()
-    
+
+    # Seules les valeurs des entrées de dict sont réécrites : commentaires
+    # et chaînes contenant les mêmes textes restent intacts
+    values = MODES[mode]
+    lines = content.splitlines(keepends=True)
+    nodes = _find_values(ast.parse(content), values)
+    # Depuis la fin pour que les offsets restent valides
+    nodes.sort(key=lambda kv: (kv[1].lineno, kv[1].col_offset), reverse=True)
+    for key, node in nodes:
+        # Offsets AST en octets UTF-8
+        line = lines[node.lineno - 1].encode('utf-8')
+        line = line[:node.col_offset] + repr(values[key]).encode('utf-8') + line[node.end_col_offset:]
+        lines[node.lineno - 1] = line.decode('utf-8')
+    content = ''.join(lines)
+
     if mode == 'dev':
-        content = content.replace('"DEV_MODE": False', '"DEV_MODE": True')
-        content = content.replace('"DEBUG_MODE": False', '"DEBUG_MODE": True')
-        content = content.replace('"WATCHDOG_ENABLED": True', '"WATCHDOG_ENABLED": False')
         print("✓ Mode DEV activé (watchdog désactivé)")
-    
     elif mode == 'prod':
-        content = content.replace('"DEV_MODE": True', '"DEV_MODE": False')
-        content = content.replace('"DEBUG_MODE": True', '"DEBUG_MODE": False')
-        content = content.replace('"WATCHDOG_ENABLED": False', '"WATCHDOG_ENABLED": True')
         print("✓ Mode PRODUCTION activé (watchdog activé)")
-    
-    with open('ta_config.py', 'w') as f:
+
+    with open('ta_config.py', 'w', encoding='utf-8') as f:
         f.write(content)
 
 if __name__ == "__main__":
     if len(sys.argv) != 2 or sys.argv[1] not in ['dev', 'prod']:
         print("Usage: python toggle_dev_mode.py [dev|prod]")
         sys.exit(1)
-    
+
     toggle_mode(sys.argv[1])
\ No newline at end of file